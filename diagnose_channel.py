@@ -1,131 +1,163 @@
 #!/usr/bin/env python3
 """Diagnostic script to analyze why Channel 0 has false detections."""
 
+import argparse
 import numpy as np
-import matplotlib.pyplot as plt
 from pathlib import Path
 
+from synthetic import njit, prange
+
+# Use the JIT kernel when numba is available, NumPy slices otherwise
+if njit is not None:
+    @njit("void(int32[:, ::1], int32[:, ::1])", parallel=True, cache=True, boundscheck=False)
+    def _neo_kernel(x, out):
+        # Channels are independent, so each thread takes whole rows
+        for c in prange(x.shape[0]):
+            for i in range(1, x.shape[1] - 1):
+                out[c, i] = abs(x[c, i] * x[c, i] - x[c, i-1] * x[c, i+1])
+
 def compute_neo(signal):
-    """Compute NEO: psi[n] = x[n]^2 - x[n-1]*x[n+1]"""
-    # Center around 0 (subtract 32768)
-    x_centered = signal.astype(np.int32) - 32768
-    
-    # NEO computation
-    neo = np.zeros(len(signal))
-    for i in range(1, len(signal) - 1):
-        curr_sq = x_centered[i] ** 2
-        neigh_mul = x_centered[i-1] * x_centered[i+1]
-        neo[i] = abs(curr_sq - neigh_mul)  # Absolute value
-    
+    """Compute NEO: psi[n] = x[n]^2 - x[n-1]*x[n+1]
+
+    Works along the last axis, so a single channel (N,) or a batch of
+    channels (C, N) is processed in one pass.
+    """
+    # Center around 0 (subtract 32768). With |x| <= 2^15 the NEO lies in
+    # [-2^30, 2^31 - 2^15], so int32 holds it without overflow. order='C'
+    # because the kernel signature only takes C-contiguous rows (a transposed
+    # or Fortran-ordered batch would not match it)
+    x = signal.astype(np.int32, order='C') - 32768
+
+    neo = np.zeros(x.shape, dtype=np.int32)
+    if njit is not None:
+        _neo_kernel(x.reshape(-1, x.shape[-1]), neo.reshape(-1, x.shape[-1]))
+    else:
+        # NEO computation on aligned slices: x[n]^2 - x[n-1]*x[n+1]
+        neo[..., 1:-1] = np.abs(x[..., 1:-1] * x[..., 1:-1] - x[..., :-2] * x[..., 2:])  # Absolute value
+
     return neo
 
-def main():
-    log_base = "test_output"
+# Figure and artists reused across plot_diagnostic() calls (parameter sweeps)
+_fig, _axes, _artists = None, None, None
+
+def _build_figure(num_channels):
+    """Create the diagnostic figure once with empty artists to update later."""
+    import matplotlib.pyplot as plt
+    
+    fig, axes = plt.subplots(2 * num_channels, 1, figsize=(15, 12))
+    artists = []
+    for ch in range(num_channels):
+        ax_data, ax_neo = axes[2 * ch], axes[2 * ch + 1]
+        
+        # Channel data
+        data_line, = ax_data.plot([], [], 'b-', linewidth=0.5, alpha=0.7, label=f'Channel {ch} ADC')
+        ax_data.axhline(y=32768, color='g', linestyle='--', alpha=0.5, label='Midpoint (32768)')
+        ax_data.set_title(f'Channel {ch} - Raw Data (first 5 seconds)')
+        ax_data.set_ylabel('ADC Value')
+        ax_data.grid(True, alpha=0.3)
+        
+        # Channel NEO
+        neo_line, = ax_neo.plot([], [], 'r-', linewidth=0.5, alpha=0.7, label=f'Channel {ch} NEO')
+        thr_line = ax_neo.axhline(y=0, color='orange', linestyle='--')
+        scatter = ax_neo.scatter([], [], color='red', s=10, label='Detections')
+        ax_neo.set_ylabel('NEO Value')
+        ax_neo.grid(True, alpha=0.3)
+        
+        artists.append((data_line, neo_line, thr_line, scatter))
+    axes[-1].set_xlabel('Time (ms)')
+    return fig, axes, artists
+
+def plot_diagnostic(log_base, threshold, channel_data, channel_neo, channel_masks):
+    """Plot raw data and NEO for each channel over the first 5 seconds."""
+    global _fig, _axes, _artists
+    if _fig is None:
+        _fig, _axes, _artists = _build_figure(len(channel_data))
+    
+    for ch, (data, neo, mask) in enumerate(zip(channel_data, channel_neo, channel_masks)):
+        ax_data, ax_neo = _axes[2 * ch], _axes[2 * ch + 1]
+        data_line, neo_line, thr_line, scatter = _artists[ch]
+        time_ms = np.arange(min(len(data), 5000))
+        first5k = mask[:5000]
+        
+        data_line.set_data(time_ms, data[:5000])
+        neo_line.set_data(time_ms, neo[:5000])
+        thr_line.set_ydata([threshold, threshold])
+        thr_line.set_label(f'Threshold ({threshold})')
+        scatter.set_offsets(np.column_stack((np.flatnonzero(first5k), neo[:5000][first5k])))
+        ax_neo.set_title(f'Channel {ch} - NEO (first 5 seconds, {np.count_nonzero(first5k)} detections)')
+        
+        for ax in (ax_data, ax_neo):
+            ax.relim()
+            ax.autoscale_view()
+            ax.legend()
+    
+    _fig.tight_layout()
+    output_file = Path("seizures") / f"{log_base}_diagnostic.png"
+    output_file.parent.mkdir(exist_ok=True)
+    _fig.savefig(output_file, dpi=150, bbox_inches='tight')
+    
+    print(f"\nDiagnostic plot saved to {output_file}")
+
+def print_channel_stats(ch, data, neo, detections):
+    """Print NEO and detection-gap statistics for one channel."""
+    print(f"\nChannel {ch} statistics:")
+    print(f"  Max NEO: {np.max(neo):.0f}")
+    print(f"  Mean NEO: {np.mean(neo):.0f}")
+    print(f"  Std NEO: {np.std(neo):.0f}")
+    print(f"  Samples above threshold: {len(detections)} ({100*len(detections)/len(data):.2f}%)")
+    if len(detections) > 0:
+        print(f"  First detection at: {detections[0]} ms")
+        print(f"  Last detection at: {detections[-1]} ms")
+    if len(detections) > 1:
+        # Check for gaps (mean gap telescopes to the first/last span)
+        mean_gap = (detections[-1] - detections[0]) / (len(detections) - 1)
+        print(f"  Average gap between detections: {mean_gap:.1f} ms")
+        print(f"  Max gap: {np.max(detections[1:] - detections[:-1])} ms")
+
+def main(log_base="test_output", plot=False):
     inputs_dir = Path("inputs")
     raw_data_file = inputs_dir / f"{log_base}_raw_data.npy"
     
     if not raw_data_file.exists():
-        print(f"File not found: {raw_data_file}")
+        print(f"File not found: {raw_data_file} (run run_tests.py with --save-raw)")
         return
     
-    raw_data = np.load(raw_data_file)
-    samples_per_channel = len(raw_data) // 32
-    
-    # Extract Channel 0 and Channel 1 data
-    ch0_start = 0 * samples_per_channel
-    ch1_start = 1 * samples_per_channel
+    raw_data = np.load(raw_data_file, mmap_mode='r')
+    channels = raw_data.reshape(32, -1)
     
-    ch0_data = raw_data[ch0_start:ch0_start + samples_per_channel]
-    ch1_data = raw_data[ch1_start:ch1_start + samples_per_channel]
+    # Compute NEO for all channels in one pass
+    neo_all = compute_neo(channels)
     
-    # Compute NEO for both channels
-    ch0_neo = compute_neo(ch0_data)
-    ch1_neo = compute_neo(ch1_data)
+    # Extract Channel 0 and Channel 1 data
+    ch0_data, ch1_data = channels[0], channels[1]
+    ch0_neo, ch1_neo = neo_all[0], neo_all[1]
     
     threshold = 120000
     
+    detections_per_ch = np.count_nonzero(neo_all > threshold, axis=1)
+    print(f"Samples with NEO > {threshold} per channel: {detections_per_ch.tolist()}")
+    
     # Find where NEO exceeds threshold
-    ch0_detections = np.where(ch0_neo > threshold)[0]
-    ch1_detections = np.where(ch1_neo > threshold)[0]
+    ch0_mask = ch0_neo > threshold
+    ch1_mask = ch1_neo > threshold
+    ch0_detections = np.flatnonzero(ch0_mask)
+    ch1_detections = np.flatnonzero(ch1_mask)
     
     print(f"Channel 0: {len(ch0_detections)} samples with NEO > {threshold}")
     print(f"Channel 1: {len(ch1_detections)} samples with NEO > {threshold}")
     
-    # Plot comparison
-    fig, axes = plt.subplots(4, 1, figsize=(15, 12))
-    
-    # Channel 0 data
-    time_ms = np.arange(len(ch0_data))
-    axes[0].plot(time_ms[:5000], ch0_data[:5000], 'b-', linewidth=0.5, alpha=0.7, label='Channel 0 ADC')
-    axes[0].axhline(y=32768, color='g', linestyle='--', alpha=0.5, label='Midpoint (32768)')
-    axes[0].set_title('Channel 0 - Raw Data (first 5 seconds)')
-    axes[0].set_ylabel('ADC Value')
-    axes[0].legend()
-    axes[0].grid(True, alpha=0.3)
-    
-    # Channel 0 NEO
-    axes[1].plot(time_ms[:5000], ch0_neo[:5000], 'r-', linewidth=0.5, alpha=0.7, label='Channel 0 NEO')
-    axes[1].axhline(y=threshold, color='orange', linestyle='--', label=f'Threshold ({threshold})')
-    axes[1].scatter(ch0_detections[ch0_detections < 5000], 
-                   ch0_neo[ch0_detections[ch0_detections < 5000]], 
-                   color='red', s=10, label='Detections')
-    axes[1].set_title(f'Channel 0 - NEO (first 5 seconds, {len(ch0_detections[ch0_detections < 5000])} detections)')
-    axes[1].set_ylabel('NEO Value')
-    axes[1].legend()
-    axes[1].grid(True, alpha=0.3)
-    
-    # Channel 1 data
-    axes[2].plot(time_ms[:5000], ch1_data[:5000], 'b-', linewidth=0.5, alpha=0.7, label='Channel 1 ADC')
-    axes[2].axhline(y=32768, color='g', linestyle='--', alpha=0.5, label='Midpoint (32768)')
-    axes[2].set_title('Channel 1 - Raw Data (first 5 seconds)')
-    axes[2].set_ylabel('ADC Value')
-    axes[2].legend()
-    axes[2].grid(True, alpha=0.3)
-    
-    # Channel 1 NEO
-    axes[3].plot(time_ms[:5000], ch1_neo[:5000], 'r-', linewidth=0.5, alpha=0.7, label='Channel 1 NEO')
-    axes[3].axhline(y=threshold, color='orange', linestyle='--', label=f'Threshold ({threshold})')
-    axes[3].scatter(ch1_detections[ch1_detections < 5000], 
-                   ch1_neo[ch1_detections[ch1_detections < 5000]], 
-                   color='red', s=10, label='Detections')
-    axes[3].set_title(f'Channel 1 - NEO (first 5 seconds, {len(ch1_detections[ch1_detections < 5000])} detections)')
-    axes[3].set_ylabel('NEO Value')
-    axes[3].set_xlabel('Time (ms)')
-    axes[3].legend()
-    axes[3].grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    output_file = Path("seizures") / f"{log_base}_diagnostic.png"
-    output_file.parent.mkdir(exist_ok=True)
-    plt.savefig(output_file, dpi=150, bbox_inches='tight')
-    plt.close()
-    
-    print(f"\nDiagnostic plot saved to {output_file}")
-    print(f"\nChannel 0 statistics:")
-    print(f"  Max NEO: {np.max(ch0_neo):.0f}")
-    print(f"  Mean NEO: {np.mean(ch0_neo):.0f}")
-    print(f"  Std NEO: {np.std(ch0_neo):.0f}")
-    print(f"  Samples above threshold: {len(ch0_detections)} ({100*len(ch0_detections)/len(ch0_data):.2f}%)")
-    if len(ch0_detections) > 0:
-        print(f"  First detection at: {ch0_detections[0]} ms")
-        print(f"  Last detection at: {ch0_detections[-1]} ms")
-        # Check for gaps
-        gaps = np.diff(ch0_detections)
-        print(f"  Average gap between detections: {np.mean(gaps):.1f} ms")
-        print(f"  Max gap: {np.max(gaps)} ms")
+    if plot:
+        plot_diagnostic(log_base, threshold, [ch0_data, ch1_data], [ch0_neo, ch1_neo], [ch0_mask, ch1_mask])
     
-    print(f"\nChannel 1 statistics:")
-    print(f"  Max NEO: {np.max(ch1_neo):.0f}")
-    print(f"  Mean NEO: {np.mean(ch1_neo):.0f}")
-    print(f"  Std NEO: {np.std(ch1_neo):.0f}")
-    print(f"  Samples above threshold: {len(ch1_detections)} ({100*len(ch1_detections)/len(ch1_data):.2f}%)")
-    if len(ch1_detections) > 0:
-        print(f"  First detection at: {ch1_detections[0]} ms")
-        print(f"  Last detection at: {ch1_detections[-1]} ms")
-        # Check for gaps
-        gaps = np.diff(ch1_detections)
-        print(f"  Average gap between detections: {np.mean(gaps):.1f} ms")
-        print(f"  Max gap: {np.max(gaps)} ms")
+    print_channel_stats(0, ch0_data, ch0_neo, ch0_detections)
+    print_channel_stats(1, ch1_data, ch1_neo, ch1_detections)
 
 if __name__ == "__main__":
-    main()
+    p = argparse.ArgumentParser(description="Analyze NEO detections on channels 0 and 1")
+    p.add_argument("log_bases", nargs="*", default=["test_output"],
+                   help="Run names to analyze from inputs/<name>_raw_data.npy (default: test_output)")
+    p.add_argument("--plot", action="store_true", help="Save a diagnostic plot (requires matplotlib)")
+    args = p.parse_args()
+    
+    for log_base in args.log_bases:
+        main(log_base, plot=args.plot)
@@ -7,13 +7,17 @@ import numpy as np
 from pathlib import Path
 from synthetic import generate_data_intan16, NUM_CHANNELS
 
+SAMPLES_PER_CHUNK = 128
+
+# Channel-ID bits [21:16] for every word of a chunk, OR'd with the sample codes
+_HEADER = np.repeat(np.arange(NUM_CHANNELS, dtype=np.uint32) << 16, SAMPLES_PER_CHUNK)
+
 def check_channel_data_ordering():
     """Check if channel data is correctly ordered in chunks."""
     print("=" * 70)
     print("Channel Data Ordering Diagnostic")
     print("=" * 70)
     
-    SAMPLES_PER_CHUNK = 128
     samples_per_channel = 1000
     num_chunks = 10
     
@@ -25,45 +29,52 @@ def check_channel_data_ordering():
     
     # Generate chunks
     print(f"\n[2] Generating chunks...")
+    data2d = all_data_16.reshape(NUM_CHANNELS, samples_per_channel).astype(np.uint32)
+    # Pad short channels with the midpoint code so every chunk is full
+    pad = num_chunks * SAMPLES_PER_CHUNK - samples_per_channel
+    if pad > 0:
+        data2d = np.pad(data2d, ((0, 0), (0, pad)), constant_values=32768)
     chunks = []
     for chunk_id in range(num_chunks):
-        chunk_bytes = bytearray()
-        for ch in range(NUM_CHANNELS):
-            for sample_in_chunk in range(SAMPLES_PER_CHUNK):
-                sample_idx = chunk_id * SAMPLES_PER_CHUNK + sample_in_chunk
-                idx = ch * samples_per_channel + sample_idx
-                code16 = int(all_data_16[idx]) if idx < len(all_data_16) else 32768
-                word32 = (ch << 16) | code16
-                chunk_bytes.extend(word32.to_bytes(4, byteorder='little'))
-        chunks.append(bytes(chunk_bytes))
+        start = chunk_id * SAMPLES_PER_CHUNK
+        codes = data2d[:, start:start + SAMPLES_PER_CHUNK].reshape(-1)
+        words = (_HEADER | codes).astype('<u4')
+        chunks.append(words.tobytes())
     
     print(f"    Generated {len(chunks)} chunks")
     
     # Verify chunk structure
     print(f"\n[3] Verifying chunk structure...")
+    exp_ch = _HEADER >> 16
     for chunk_id in [0, 1]:
-        chunk = chunks[chunk_id]
+        words = np.frombuffer(chunks[chunk_id], dtype='<u4')
+        ext_ch = (words >> 16) & 0x3F
+        ext_code = words & 0xFFFF
         print(f"\n    Chunk {chunk_id}:")
         
         # Check first few words
         for word_idx in [0, 127, 128, 255, 256, 383, 384]:
-            if word_idx * 4 < len(chunk):
-                word_bytes = chunk[word_idx*4:(word_idx+1)*4]
-                word32 = int.from_bytes(word_bytes, byteorder='little')
-                extracted_ch = (word32 >> 16) & 0x3F
-                extracted_code = word32 & 0xFFFF
-                expected_ch = word_idx // SAMPLES_PER_CHUNK
+            if word_idx < len(words):
                 expected_sample = word_idx % SAMPLES_PER_CHUNK
                 
-                status = "✓" if extracted_ch == expected_ch else "✗"
-                print(f"      Word {word_idx:4d}: {status} ch={extracted_ch:2d} (exp {expected_ch:2d}), "
-                      f"sample={expected_sample:3d}, code=0x{extracted_code:04X}")
+                status = "✓" if ext_ch[word_idx] == exp_ch[word_idx] else "✗"
+                print(f"      Word {word_idx:4d}: {status} ch={ext_ch[word_idx]:2d} (exp {exp_ch[word_idx]:2d}), "
+                      f"sample={expected_sample:3d}, code=0x{ext_code[word_idx]:04X}")
                 
-                if extracted_ch != expected_ch:
+                if ext_ch[word_idx] != exp_ch[word_idx]:
                     print(f"        *** MISMATCH! ***")
+        
+        # Check every word in the chunk at once
+        ch_ok = np.array_equal(ext_ch, exp_ch)
+        print(f"      All {len(words)} words: {'✓' if ch_ok else '✗'} channel IDs")
+        if not ch_ok:
+            print(f"        *** MISMATCH at words {np.flatnonzero(ext_ch != exp_ch)[:8].tolist()} ***")
     
     # Check specific channels
     print(f"\n[4] Checking specific channels (0, 11, 12, 20, 31)...")
+    words = np.frombuffer(chunks[0], dtype='<u4')
+    ext_ch = (words >> 16) & 0x3F
+    ext_code = words & 0xFFFF
     for ch in [0, 11, 12, 20, 31]:
         chunk_id = 0
         sample_in_chunk = 0
@@ -73,12 +84,9 @@ def check_channel_data_ordering():
         # Get word position in chunk
         word_idx = ch * SAMPLES_PER_CHUNK + sample_in_chunk
         
-        chunk = chunks[chunk_id]
-        if word_idx * 4 < len(chunk):
-            word_bytes = chunk[word_idx*4:(word_idx+1)*4]
-            word32 = int.from_bytes(word_bytes, byteorder='little')
-            extracted_ch = (word32 >> 16) & 0x3F
-            extracted_code = word32 & 0xFFFF
+        if word_idx < len(words):
+            extracted_ch = ext_ch[word_idx]
+            extracted_code = ext_code[word_idx]
             expected_code = all_data_16[idx]
             
             status = "✓" if (extracted_ch == ch and extracted_code == expected_code) else "✗"
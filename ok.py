@@ -107,6 +107,8 @@ class okCFrontPanel:
         self.handle = _lib.okFrontPanel_Construct()
         if not self.handle:
             raise RuntimeError("Failed to construct okCFrontPanel")
+        # Scratch buffers for ReadFromPipeOut, reused per transfer length
+        self._read_bufs = {}
     
     def __del__(self):
         if hasattr(self, 'handle') and self.handle:
@@ -169,12 +171,30 @@ class okCFrontPanel:
     
     def ReadFromPipeOut(self, ep, length):
         """Read data from PipeOut"""
-        data_array = (ctypes.c_ubyte * length)()
+        data_array = self._read_bufs.get(length)
+        if data_array is None:
+            data_array = self._read_bufs[length] = (ctypes.c_ubyte * length)()
         result = _lib.okFrontPanel_ReadFromPipeOut(self.handle, ep, length, data_array)
         if result < 0:
             return bytearray()
         return bytearray(data_array[:result])
-    
+
+    def WriteToPipeInArray(self, ep, arr):
+        """Write a C-contiguous NumPy array to PipeIn without copying it"""
+        if not hasattr(arr, 'ctypes') or not arr.flags.c_contiguous:
+            raise TypeError("arr must be a C-contiguous NumPy array")
+        data_ptr = arr.ctypes.data_as(ctypes.POINTER(ctypes.c_ubyte))
+        return _lib.okFrontPanel_WriteToPipeIn(self.handle, ep, arr.nbytes, data_ptr)
+
+    def ReadFromPipeOutInto(self, ep, out_arr):
+        """Read from PipeOut directly into a preallocated C-contiguous NumPy array"""
+        if not hasattr(out_arr, 'ctypes') or not out_arr.flags.c_contiguous:
+            raise TypeError("out_arr must be a C-contiguous NumPy array")
+        if not out_arr.flags.writeable:
+            raise ValueError("out_arr must be writable")
+        data_ptr = out_arr.ctypes.data_as(ctypes.POINTER(ctypes.c_ubyte))
+        return _lib.okFrontPanel_ReadFromPipeOut(self.handle, ep, out_arr.nbytes, data_ptr)
+
     def GetLastError(self):
         """Get last error code (may not be available in C API)"""
         # C API doesn't have GetLastError, return 0 (NoError) as default
@@ -4,22 +4,24 @@ import os
 import sys
 import argparse
 import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from synthetic import generate_data_intan16, NUM_CHANNELS
+import numpy as np
+
+from synthetic import generate_data_intan16, NUM_CHANNELS, njit, prange
 
 # -------------------------------------------------------------------------------------------------
 # Import OK module (Copied over from Intan RHX Repository to support MacOS)
 # -------------------------------------------------------------------------------------------------
-ok_module_path = Path(__file__).resolve().parent / "ok.py"
-if ok_module_path.exists():
-    import importlib.util
-    spec = importlib.util.spec_from_file_location("ok", ok_module_path)
-    ok = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(ok)
-else:
-    raise ImportError("ok.py not found")
+# Plain import from this directory so CPython caches the compiled ok.py
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+try:
+    import ok
+except ImportError as e:
+    raise ImportError(f"ok.py not found next to {Path(__file__).name}") from e
 
 # -------------------------------------------------------------------------------------------------
 # Constants
@@ -32,41 +34,71 @@ WIREIN_THRESHOLD, WIREIN_WINDOW_TIMEOUT, WIREIN_TRANSITION_COUNT = 0x03, 0x04, 0
 SAMPLES_PER_CHUNK = 128 # const by Intan SDK
 SAMPLE_SIZE_BYTES = 4 # const by Intan SDK
 CHUNK_BYTES = NUM_CHANNELS * SAMPLES_PER_CHUNK * SAMPLE_SIZE_BYTES
+assert CHUNK_BYTES % 16 == 0, "PipeIn transfers must be a multiple of 16 bytes"
 MAX_EVENTS = 10000
 EVENT_BUFFER_SIZE = MAX_EVENTS * SAMPLE_SIZE_BYTES
+EVENT_BUF = np.empty(EVENT_BUFFER_SIZE, dtype=np.uint8) # reused PipeOut landing buffer
+EVENT_NAMES = ("IDLE ", "START", "END  ", "IDLE ") # indexed by 2-bit event code
+
+# Pack chunks with a JIT kernel when numba is available, NumPy otherwise
+if njit is not None:
+    @njit(cache=True, parallel=True, boundscheck=False)
+    def _pack_chunks_kernel(all_data_16, out, samples_per_channel, num_channels, samples_per_chunk):
+        for chunk_id in prange(out.shape[0]):
+            for ch in range(num_channels):
+                for s in range(samples_per_chunk):
+                    sample_idx = chunk_id * samples_per_chunk + s
+                    code = np.uint32(32768)  # midpoint past the end of a channel
+                    if sample_idx < samples_per_channel:
+                        code = np.uint32(all_data_16[ch * samples_per_channel + sample_idx])
+                    out[chunk_id, ch * samples_per_chunk + s] = (np.uint32(ch) << np.uint32(16)) | code
 
 def generate_synthetic_data_chunks(num_chunks=450, samples_per_channel=60000, seed=None, log_path=None):
-    """Generate synthetic neural data chunks formatted for FPGA."""
+    """Generate synthetic neural data chunks formatted for FPGA.
+
+    Returns a (num_chunks, CHUNK_BYTES) uint8 array, one row per chunk, the raw
+    uint16 samples (read-only), and the thread saving them to disk (None
+    without log_path).
+    """
     all_data_16 = generate_data_intan16(NUM_CHANNELS, samples_per_channel, 
                                         sample_rate=1000.0, enable_seizures=True)
+    # Packing works on raw uint16 codes, never boxed Python ints
+    all_data_16 = np.ascontiguousarray(all_data_16, dtype=np.uint16)
+    # This one buffer is shared by the packer, the saver and the plotter
+    all_data_16.setflags(write=False)
     
-    # Save raw data for visualization
+    # Save raw data for diagnose_channel.py in the background so streaming is
+    # not held up by the disk write. Not a daemon: the interpreter waits for it
+    # on every exit path (including sys.exit), so the .npy is never truncated
+    save_thread = None
     if log_path:
         inputs_dir = Path("inputs")
         inputs_dir.mkdir(exist_ok=True)
         log_base = Path(log_path).stem
-        import numpy as np
         raw_data_file = inputs_dir / f"{log_base}_raw_data.npy"
-        np.save(raw_data_file, all_data_16)
-        print(f"[SAVE] Raw data saved to {raw_data_file} ({len(all_data_16)} samples, shape: {all_data_16.shape})")
+        save_thread = threading.Thread(target=np.save, args=(raw_data_file, all_data_16))
+        save_thread.start()
+        print(f"[SAVE] Saving raw data to {raw_data_file} ({len(all_data_16)} samples, shape: {all_data_16.shape})")
     
-    chunks = []
-    for chunk_id in range(num_chunks):
-        chunk_bytes = bytearray()
-        for ch in range(NUM_CHANNELS):
-            for sample_in_chunk in range(SAMPLES_PER_CHUNK):
-                sample_idx = chunk_id * SAMPLES_PER_CHUNK + sample_in_chunk
-                idx = ch * samples_per_channel + sample_idx
-                code16 = int(all_data_16[idx]) if idx < len(all_data_16) else 32768
-                word32 = (ch << 16) | code16
-                chunk_bytes.extend(word32.to_bytes(4, byteorder='little'))
-        chunks.append(bytes(chunk_bytes))
-    return chunks, all_data_16
-
-def ensure_multiple_of_16(data: bytes) -> bytes:
-    """Ensure padded by multiple of 16 bytes (required for PipeIn)."""
-    rem = len(data) % 16
-    return data if rem == 0 else data + bytes(16 - rem)
+    words = np.empty((num_chunks, NUM_CHANNELS * SAMPLES_PER_CHUNK), dtype='<u4')
+    if njit is not None:
+        _pack_chunks_kernel(all_data_16, words, samples_per_channel, NUM_CHANNELS, SAMPLES_PER_CHUNK)
+    else:
+        # Pad each channel with the midpoint code so the last chunk is full
+        codes = all_data_16.reshape(NUM_CHANNELS, samples_per_channel).astype(np.uint32)
+        pad = num_chunks * SAMPLES_PER_CHUNK - samples_per_channel
+        if pad > 0:
+            codes = np.pad(codes, ((0, 0), (0, pad)), constant_values=32768)
+        codes = codes[:, :num_chunks * SAMPLES_PER_CHUNK].reshape(NUM_CHANNELS, num_chunks, SAMPLES_PER_CHUNK)
+        
+        # All chunks live in one contiguous buffer; word layout: [21:16] = channel ID, [15:0] = ADC code
+        ch_tag = (np.arange(NUM_CHANNELS, dtype=np.uint32) << 16)[:, None]
+        np.bitwise_or(codes.transpose(1, 0, 2), ch_tag,
+                      out=words.reshape(num_chunks, NUM_CHANNELS, SAMPLES_PER_CHUNK))
+    
+    # One uint8 row of CHUNK_BYTES per chunk, ready for WriteToPipeInArray
+    chunks = words.view(np.uint8)
+    return chunks, all_data_16, save_thread
 
 def parse_seizure_events(output_file):
     """Parse START/END events from outputs file."""
@@ -104,10 +136,35 @@ def parse_seizure_events(output_file):
     
     return seizures
 
-def plot_raw_data(log_base, num_chunks):
-    """Generate plots with seizure regions marked."""
+def seizures_from_events(events):
+    """Pair START/END events (in arrival order) into (start, end) timestamps.
+
+    Same pairing as parse_seizure_events, but on in-memory (code, name, ts, word)
+    event tuples instead of the per-channel output file.
+    """
+    seizures = []
+    start_time = None
+    for event_code, _, timestamp25, _ in events:
+        if event_code == 0x1:
+            start_time = timestamp25
+        elif event_code == 0x2 and start_time is not None:
+            seizures.append((start_time, timestamp25))
+            start_time = None
+    
+    # Handle ongoing seizure (START without END)
+    if start_time is not None:
+        seizures.append((start_time, None))
+    
+    return seizures
+
+def plot_raw_data(log_base, num_chunks, events_by_channel=None, raw_data=None):
+    """Generate plots with seizure regions marked.
+
+    Seizures come from events_by_channel when given, otherwise they are parsed
+    back from the per-channel files in outputs/. Likewise raw_data defaults to
+    the array saved in inputs/.
+    """
     try:
-        import numpy as np
         import matplotlib.pyplot as plt
     except ImportError:
         print("[PLOT] Skipping plots - matplotlib not available")
@@ -115,13 +172,13 @@ def plot_raw_data(log_base, num_chunks):
     
     inputs_dir = Path("inputs")
     outputs_dir = Path("outputs")
-    raw_data_file = inputs_dir / f"{log_base}_raw_data.npy"
-    
-    if not raw_data_file.exists():
-        print(f"[PLOT] Raw data file not found: {raw_data_file}")
-        return
     
-    raw_data = np.load(raw_data_file)
+    if raw_data is None:
+        raw_data_file = inputs_dir / f"{log_base}_raw_data.npy"
+        if not raw_data_file.exists():
+            print(f"[PLOT] Raw data file not found: {raw_data_file}")
+            return
+        raw_data = np.load(raw_data_file)
     
     seizures_dir = Path("seizures")
     seizures_dir.mkdir(exist_ok=True)
@@ -129,6 +186,19 @@ def plot_raw_data(log_base, num_chunks):
     samples_sent = num_chunks * SAMPLES_PER_CHUNK
     duration_ms = samples_sent  # At 1 kHz: samples = milliseconds
     
+    # One row per channel, keeping only the samples that were actually sent
+    channels = raw_data.reshape(NUM_CHANNELS, -1)[:, :samples_sent]
+    # Min/max decimation to ~2000 bins per line: every bin keeps its extremes,
+    # so 1-2 sample spikes stay visible (plain striding would drop most of them)
+    ds = max(1, channels.shape[1] // 2000)
+    bin_starts = np.arange(0, channels.shape[1], ds)
+    lo = np.minimum.reduceat(channels, bin_starts, axis=1)
+    hi = np.maximum.reduceat(channels, bin_starts, axis=1)
+    # Interleave each bin's min and max so one line traces the whole envelope;
+    # time in milliseconds (1 sample = 1ms at 1kHz), shared by every channel
+    time_ms = np.repeat(bin_starts, 2)
+    envelopes = np.stack((lo, hi), axis=-1).reshape(NUM_CHANNELS, -1)
+    
     # Plot all 32 channels in blocks of 4, arranged in 3x3 grid
     num_blocks = (NUM_CHANNELS + 3) // 4  # 8 blocks for 32 channels
     fig = plt.figure(figsize=(20, 15))
@@ -150,31 +220,23 @@ def plot_raw_data(log_base, num_chunks):
             # Create subplot for this channel
             ax_ch = fig.add_subplot(block_gs[ch_idx, 0])
             
-            # Calculate start index for this channel
-            channel_start_idx = ch * len(raw_data) // NUM_CHANNELS
-            # Only plot the samples that were actually sent
-            channel_data = raw_data[channel_start_idx:channel_start_idx + samples_sent]
+            # Plot the raw data (min/max envelope per bin)
+            ax_ch.plot(time_ms, envelopes[ch], linewidth=0.3, alpha=0.7, color='blue')
             
-            # Time in milliseconds (1 sample = 1ms at 1kHz)
-            time_ms = np.arange(len(channel_data))
-            
-            # Plot the raw data
-            ax_ch.plot(time_ms, channel_data, linewidth=0.3, alpha=0.7, color='blue')
-            
-            # Load and mark seizure regions
-            output_file = outputs_dir / f"{log_base}_ch{ch}.txt"
-            seizures = parse_seizure_events(output_file)
+            # Mark seizure regions
+            if events_by_channel is not None:
+                seizures = seizures_from_events(events_by_channel.get(ch, ()))
+            else:
+                seizures = parse_seizure_events(outputs_dir / f"{log_base}_ch{ch}.txt")
             
-            # Draw semi-transparent rectangles for each seizure
-            for start_ms, end_ms in seizures:
-                if end_ms is None:
-                    # Ongoing seizure - extend to end of plot
-                    end_ms = duration_ms
-                # Only shade if within plot range
-                if start_ms < duration_ms:
-                    end_ms_plot = min(end_ms, duration_ms)
-                    ax_ch.axvspan(start_ms, end_ms_plot, 
-                                 alpha=0.3, color='red', label='Seizure' if start_ms == seizures[0][0] else '')
+            # Shade every seizure within the plot range as (start, width) spans;
+            # an ongoing seizure (no END) extends to the end of the plot
+            spans = [(start_ms, min(duration_ms if end_ms is None else end_ms, duration_ms) - start_ms)
+                     for start_ms, end_ms in seizures if start_ms < duration_ms]
+            if spans:
+                # x in data coordinates, y over the full axes height (like axvspan)
+                ax_ch.broken_barh(spans, (0, 1), transform=ax_ch.get_xaxis_transform(),
+                                  alpha=0.3, color='red', label='Seizure')
             
             ax_ch.set_xlim(0, duration_ms)
             ax_ch.set_title(f'Channel {ch}', fontsize=9)
@@ -193,6 +255,35 @@ def plot_raw_data(log_base, num_chunks):
     plt.close()
     print(f"[PLOT] Saved plot to {plot_file}")
 
+def open_device(bitfile):
+    """Open the first Opal Kelly device and configure it with bitfile if given.
+
+    Returns (device, messages); device is None on error. The messages are
+    returned rather than logged so a worker thread never writes to the log.
+    """
+    messages = []
+    dev = ok.okCFrontPanel()
+    count = dev.GetDeviceCount()
+    if count <= 0:
+        messages.append("ERROR: No Opal Kelly devices found.")
+        return None, messages
+    
+    serial = dev.GetDeviceListSerial(0)
+    rc = dev.OpenBySerial(serial)
+    messages.append(f"[CONNECT] OpenBySerial({serial}) rc={rc}")
+    if rc != ok.okCFrontPanel.NoError:
+        messages.append(f"ERROR: OpenBySerial failed")
+        return None, messages
+    
+    # Configure FPGA
+    if bitfile:
+        rc = dev.ConfigureFPGA(os.path.abspath(bitfile))
+        messages.append(f"[CONFIGURE] ConfigureFPGA rc={rc}")
+        if rc != ok.okCFrontPanel.NoError:
+            messages.append("ERROR: ConfigureFPGA failed")
+            return None, messages
+    return dev, messages
+
 def main():
     p = argparse.ArgumentParser(description="Test seizure detection on Opal Kelly FPGA")
     # FPGA Configuration
@@ -201,21 +292,21 @@ def main():
     p.add_argument("--seed", type=int, default=None, help="Random seed")
     p.add_argument("--chunks", type=int, default=469, help="Number of chunks (default: 469)")
     p.add_argument("--samples", type=int, default=60000, help="Samples per channel (default: 60000)")
+    p.add_argument("--batch-chunks", type=int, default=1,
+                   help="Chunks per PipeIn transfer (default: 1; larger values risk FIFO In overflow)")
     # Datapath Configuration Parameters
     p.add_argument("--threshold", type=int, default=170000, help="NEO threshold (default: 150000)")
     p.add_argument("--window-timeout", type=int, default=300, help="Window timeout in samples (default: 300)")
     p.add_argument("--transition-count", type=int, default=50, help="Detections needed to start seizure (default: 50)")
     # Logging
     p.add_argument("--log", type=str, default="run_halo_log.txt", help="Log file path")
+    p.add_argument("--save-raw", action="store_true",
+                   help="Also save raw input data to inputs/<log>_raw_data.npy (for diagnose_channel.py)")
     args = p.parse_args()
     
     if args.seed is not None:
         random.seed(args.seed)
-        try:
-            import numpy as np
-            np.random.seed(args.seed)
-        except ImportError:
-            pass
+        np.random.seed(args.seed)
     
     # Clean outputs
     import shutil
@@ -226,123 +317,123 @@ def main():
         dir_path.mkdir(exist_ok=True)
     
     with open(args.log, "w", encoding="utf-8") as log:
-        def log_msg(msg): print(msg); log.write(msg + "\n"); log.flush()
+        # Buffered: flushed at section banners and when the file is closed
+        def log_msg(msg): print(msg); log.write(msg + "\n")
         
         log_msg("=" * 70)
         log_msg("Opal Kelly Seizure Detection Test")
         log_msg("=" * 70)
+        log.flush()
 
         
+        # Open and configure the device in the background; the USB calls release
+        # the GIL, so they overlap with data generation on this thread. Its
+        # messages are logged here once it is done, keeping the log single-writer
+        device_pool = ThreadPoolExecutor(max_workers=1)
+        device_future = device_pool.submit(open_device, args.bitfile)
+        
         # Generate data
         log_msg(f"\n[DATA] Generating {args.chunks} chunks...")
-        chunks, raw_data = generate_synthetic_data_chunks(args.chunks, args.samples, args.seed, log_path=args.log)
+        chunks, raw_data, save_thread = generate_synthetic_data_chunks(args.chunks, args.samples, args.seed,
+                                                                    log_path=args.log if args.save_raw else None)
         log_msg(f"[DATA] Generated {len(chunks)} chunks ({len(chunks) * CHUNK_BYTES} bytes)")
         
-        # Initialize device
-        dev = ok.okCFrontPanel()
-        count = dev.GetDeviceCount()
-        if count <= 0:
-            log_msg("ERROR: No Opal Kelly devices found.")
+        dev, device_messages = device_future.result()
+        device_pool.shutdown()
+        for msg in device_messages:
+            log_msg(msg)
+        if dev is None:
             sys.exit(1)
         
-        serial = dev.GetDeviceListSerial(0)
-        rc = dev.OpenBySerial(serial)
-        log_msg(f"[CONNECT] OpenBySerial({serial}) rc={rc}")
-        if rc != ok.okCFrontPanel.NoError:
-            log_msg(f"ERROR: OpenBySerial failed")
-            sys.exit(1)
-        
-        # Configure FPGA
-        if args.bitfile:
-            rc = dev.ConfigureFPGA(os.path.abspath(args.bitfile))
-            log_msg(f"[CONFIGURE] ConfigureFPGA rc={rc}")
-            if rc != ok.okCFrontPanel.NoError:
-                log_msg("ERROR: ConfigureFPGA failed")
-                sys.exit(1)
-        
-        # Set parameters
-        dev.SetWireInValue(WIREIN_THRESHOLD, args.threshold & 0xFFFFFFFF, 0xFFFFFFFF)
-        dev.SetWireInValue(WIREIN_WINDOW_TIMEOUT, args.window_timeout & 0xFFFFFFFF, 0xFFFFFFFF)
-        dev.SetWireInValue(WIREIN_TRANSITION_COUNT, args.transition_count & 0xFFFFFFFF, 0xFFFFFFFF)
-        
-        # Reset and timestamp
+        # Set parameters and timestamp once (SetWireInValue masks to 32 bits);
+        # they go out with the first UpdateWireIns and stay latched after it
         ts = random.getrandbits(64) if args.seed is None else args.seed
-        dev.SetWireInValue(WIREIN_TS_LO, ts & 0xFFFFFFFF, 0xFFFFFFFF)
-        dev.SetWireInValue(WIREIN_TS_HI, (ts >> 32) & 0xFFFFFFFF, 0xFFFFFFFF)
-        dev.SetWireInValue(WIREIN_CTRL, 0x8000_0000, 0xFFFFFFFF)
+        dev.SetWireInValue(WIREIN_THRESHOLD, args.threshold)
+        dev.SetWireInValue(WIREIN_WINDOW_TIMEOUT, args.window_timeout)
+        dev.SetWireInValue(WIREIN_TRANSITION_COUNT, args.transition_count)
+        dev.SetWireInValue(WIREIN_TS_LO, ts)
+        dev.SetWireInValue(WIREIN_TS_HI, ts >> 32)
+        
+        # Reset pulse: the RTL samples ep00wire[31] as a level, so assert and
+        # release need separate UpdateWireIns; only CTRL changes in between
+        dev.SetWireInValue(WIREIN_CTRL, 0x8000_0000)
         dev.UpdateWireIns()
-        dev.SetWireInValue(WIREIN_CTRL, 0x0000_0000, 0xFFFFFFFF)
+        dev.SetWireInValue(WIREIN_CTRL, 0x0000_0000)
         dev.UpdateWireIns()
         
         # Send data
         log_msg(f"\n[SEND] Sending {len(chunks)} chunks to PipeIn 0x{PIPE_IN_ADDR:02X}...")
-        for chunk_idx, chunk_data in enumerate(chunks):
-            padded = ensure_multiple_of_16(chunk_data)
-            status = dev.WriteToPipeIn(PIPE_IN_ADDR, bytearray(padded))
+        # Consecutive chunk rows are contiguous, so --batch-chunks > 1 sends them as
+        # one transfer to amortize per-call USB overhead. Opt-in only: the datapath
+        # drains FIFO In at one word per 2 okClk, the FIFO is 1024 words deep and
+        # its full flag is not wired back, so longer bursts raise the overflow risk
+        batch = max(1, args.batch_chunks)
+        for first in range(0, len(chunks), batch):
+            block = chunks[first:first + batch]
+            status = dev.WriteToPipeInArray(PIPE_IN_ADDR, block)
             if status < 0:
-                log_msg(f"ERROR: WriteToPipeIn failed for chunk {chunk_idx}")
+                log_msg(f"ERROR: WriteToPipeIn failed for chunks {first}-{first + len(block) - 1}")
                 sys.exit(1)
-            if (chunk_idx + 1) % 50 == 0:
-                log_msg(f"  Sent {chunk_idx + 1}/{len(chunks)} chunks")
+            sent = first + len(block)
+            if sent // 50 > first // 50:
+                log_msg(f"  Sent {sent}/{len(chunks)} chunks")
         log_msg(f"[DONE] Sent all {len(chunks)} chunks")
         
         time.sleep(0.5)
         
         # Read events (ToDo: In Parallel)
         log_msg(f"\n[READ] Reading events from PipeOut 0x{PIPE_OUT_ADDR:02X}...")
-        out = dev.ReadFromPipeOut(PIPE_OUT_ADDR, EVENT_BUFFER_SIZE)
-        bytes_read = len(out)
+        status = dev.ReadFromPipeOutInto(PIPE_OUT_ADDR, EVENT_BUF)
+        bytes_read = max(status, 0)
         log_msg(f"[DONE] Read {bytes_read} bytes ({bytes_read // 4} words)")
         
         # Parse events: [31:30]=event_code, [29:25]=channel_id, [24:0]=timestamp
-        words = [int.from_bytes(out[i:i+4], byteorder="little") 
-                 for i in range(0, bytes_read, 4) if i + 4 <= bytes_read]
+        words = np.frombuffer(EVENT_BUF, dtype='<u4', count=bytes_read // 4)
+        event_codes = (words >> 30) & 0x3
+        channel_ids = (words >> 25) & 0x1F
+        timestamps = words & 0x01FF_FFFF
         
-        # Group events by channel
-        events_by_channel = {ch: [] for ch in range(32)}
-        starts, ends, idle = 0, 0, 0
+        starts = int(np.count_nonzero(event_codes == 0x1))
+        ends = int(np.count_nonzero(event_codes == 0x2))
+        idle = len(words) - starts - ends
         
-        for w in words:
-            event_code = (w >> 30) & 0x3
-            channel_id = (w >> 25) & 0x1F
-            timestamp25 = w & 0x01FF_FFFF
-            
-            if event_code == 0x1:
-                event_str, starts = "START", starts + 1
-            elif event_code == 0x2:
-                event_str, ends = "END  ", ends + 1
-            else:
-                event_str, idle = "IDLE ", idle + 1
-            
-            events_by_channel[channel_id].append((event_code, event_str, timestamp25, w))
+        # Group events by channel: a stable sort keeps each channel's events in
+        # arrival order, and searchsorted finds where every channel's run starts;
+        # only channels that actually reported events get an entry
+        order = np.argsort(channel_ids, kind='stable')
+        bounds = np.searchsorted(channel_ids[order], np.arange(NUM_CHANNELS + 1)).tolist()
+        rows = list(zip(event_codes[order].tolist(), timestamps[order].tolist(), words[order].tolist()))
+        events_by_channel = {ch: [(event_code, EVENT_NAMES[event_code], timestamp25, w)
+                                  for event_code, timestamp25, w in rows[bounds[ch]:bounds[ch + 1]]]
+                             for ch in range(NUM_CHANNELS) if bounds[ch] < bounds[ch + 1]}
         
-        # Write per-channel
+        # Write per-channel (outputs/ was recreated by the cleanup above)
         log_base = Path(args.log).stem
         outputs_dir = Path("outputs")
-        outputs_dir.mkdir(exist_ok=True)
         
         log_msg(f"\n" + "=" * 70)
         log_msg("OUTPUT")
         log_msg("=" * 70)
+        log.flush()
         
-        for ch in range(32):
-            if events_by_channel[ch]:
-                # Count seizures
-                seizure_count = sum(1 for event_code, _, _, _ in events_by_channel[ch] if event_code == 0x1)
-                
-                # Create logs
-                ch_file = outputs_dir / f"{log_base}_ch{ch}.txt"
-                with open(ch_file, "w", encoding="utf-8") as f:
-                    f.write(f"Channel {ch} - Seizure Detection Events\n")
-                    f.write("=" * 70 + "\n")
-                    f.write("EventCode | Timestamp | RawWordHex\n")
-                    f.write("-" * 70 + "\n")
-                    for event_code, event_str, timestamp25, w in events_by_channel[ch]:
-                        f.write(f"{event_code:02d} ({event_str}) | {timestamp25:019d} | 0x{w:08X}\n")
-                    f.write("=" * 70 + "\n")
-                    f.write(f"Total seizures: {seizure_count}\n")
-                    f.write(f"Total events: {len(events_by_channel[ch])}\n")
-                log_msg(f"  Channel {ch:2d}: {seizure_count:3d} seizures ({len(events_by_channel[ch]):5d} events) -> {ch_file}")
+        for ch, events in events_by_channel.items():
+            # Count seizures
+            seizure_count = sum(1 for event_code, _, _, _ in events if event_code == 0x1)
+            
+            # Create logs
+            ch_file = outputs_dir / f"{log_base}_ch{ch}.txt"
+            lines = [f"Channel {ch} - Seizure Detection Events\n",
+                     "=" * 70 + "\n",
+                     "EventCode | Timestamp | RawWordHex\n",
+                     "-" * 70 + "\n"]
+            lines += [f"{event_code:02d} ({event_str}) | {timestamp25:019d} | 0x{w:08X}\n"
+                      for event_code, event_str, timestamp25, w in events]
+            lines += ["=" * 70 + "\n",
+                      f"Total seizures: {seizure_count}\n",
+                      f"Total events: {len(events)}\n"]
+            with open(ch_file, "w", encoding="utf-8") as f:
+                f.write("".join(lines))
+            log_msg(f"  Channel {ch:2d}: {seizure_count:3d} seizures ({len(events):5d} events) -> {ch_file}")
         
         # Summary in main log
         log_msg("=" * 70)
@@ -355,10 +446,15 @@ def main():
             log_msg("\nWARNING: All events are idle")
         else:
             log_msg(f"\nSUCCESS: {starts} starts, {ends} ends")
+        log.flush()
         
         # Generate plots
         log_msg(f"\n[PLOT] Generating plots from raw input data...")
-        plot_raw_data(log_base, args.chunks)
+        plot_raw_data(log_base, args.chunks, events_by_channel, raw_data)
+        
+        # Let the background np.save finish before reporting the run as done
+        if save_thread is not None:
+            save_thread.join()
     
     print(f"\nDONE! Log written to {args.log}")
 
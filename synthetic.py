@@ -1,7 +1,16 @@
 import math
-import random
 import time
 
+import numpy as np
+
+# Numba is optional, and this is the one place that checks for it: run_tests.py
+# and diagnose_channel.py import njit/prange from here. Without numba both are
+# None and every JIT kernel (here: channel simulation) falls back to NumPy
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = prange = None
+
 NUM_CHANNELS = 32
 SAMPLES_PER_CHANNEL = 128
 TIMESTAMP_BYTES = 8
@@ -16,7 +25,41 @@ AVERAGE_STEP_SIZE = 3
 WINDOW_TIMEOUT = 200
 TRANSITION_COUNT = 10
 
+# Noise and LFP constants from Intan SDK, shared by the per-sample and batched generators
+NOISE_RMS_LEVEL_UV = 5.0
+LFP_FREQUENCY_HZ = 2.3
+LFP_MODULATION_HZ = 0.5
+
+# Seizure parameters (added by me)
+SEIZURE_DURATION_MS = 6000.0  # 6 seconds
+SEIZURE_FREQ_HZ = 2.5  # 2.5 Hz low-frequency seizure activity
+SEIZURE_AMPLITUDE_UV = 500.0  # Very high amplitude seizure
+SEIZURE_PROBABILITY = 0.01  # 1% chance per second (lower chance = more dramatic)
+
+SPIKE_REFRACTORY_PERIOD_MS = 5.0
+
+def _log_uniform(rng, min_val, max_val, size=None):
+    """Generate log-uniform random value (or array of size values)"""
+    log_min = math.log(min_val)
+    log_max = math.log(max_val)
+    return np.exp(rng.uniform(log_min, log_max, size))
+
+def _draw_spike_params(rng, n_units):
+    """Draw (spike_amplitude, spike_duration_ms, spike_rate_hz) arrays for n_units units"""
+    # Spike amplitude: -200 to -500 µV (negative going spikes)
+    spike_amplitude = rng.uniform(-500.0, -200.0, n_units)
+    # Spike duration: 0.3 to 1.7 ms
+    spike_duration_ms = rng.uniform(0.3, 1.7, n_units)
+    # Spike rate: 0.1 to 50 Hz (log-uniform distribution)
+    spike_rate_hz = _log_uniform(rng, 0.1, 50.0, n_units)
+    return spike_amplitude, spike_duration_ms, spike_rate_hz
+
 class NeuralSynthSource:
+    """One channel of the same statistical model as generate_block(), evaluated sample by sample.
+
+    The random draws come in a different order, so a given seed does not
+    reproduce generate_block()'s samples.
+    """
     
     def __init__(self, sample_rate, n_units=2, seed=None, enable_seizures=True):
         self.sample_rate = sample_rate
@@ -26,71 +69,52 @@ class NeuralSynthSource:
         self.enable_seizures = enable_seizures
         
         # Constants from Intan SDK
-        self.noise_rms_level_uv = 5.0
-        self.spike_refractory_period_ms = 5.0
-        self.lfp_frequency_hz = 2.3
-        self.lfp_modulation_hz = 0.5
+        self.noise_rms_level_uv = NOISE_RMS_LEVEL_UV
+        self.spike_refractory_period_ms = SPIKE_REFRACTORY_PERIOD_MS
+        self.lfp_frequency_hz = LFP_FREQUENCY_HZ
+        self.lfp_modulation_hz = LFP_MODULATION_HZ
         
         # Seizure parameters (added by me)
         self.seizure_start_time_ms = None
-        self.seizure_duration_ms = 6000.0  # 6 seconds
-        self.seizure_freq_hz = 2.5  # 2.5 Hz low-frequency seizure activity
-        self.seizure_amplitude_uv = 500.0  # Very high amplitude seizure 
-        self.seizure_probability = 0.01  # 1% chance per second (lower chance = more dramatic)
+        self.seizure_duration_ms = SEIZURE_DURATION_MS
+        self.seizure_freq_hz = SEIZURE_FREQ_HZ
+        self.seizure_amplitude_uv = SEIZURE_AMPLITUDE_UV
+        self.seizure_probability = SEIZURE_PROBABILITY
         
-        # Initialize random state
-        if seed is not None:
-            random.seed(seed)
+        # Angular frequencies in rad/ms, so the sines below take t_ms directly
+        self.lfp_omega = 2.0 * math.pi * self.lfp_frequency_hz / 1000.0
+        self.lfp_modulation_omega = 2.0 * math.pi * self.lfp_modulation_hz / 1000.0
+        self.seizure_omega = 2.0 * math.pi * self.seizure_freq_hz / 1000.0
+        # Spike envelope exp(-2 t) advances by one multiply per sample
+        self.spike_decay_step = math.exp(-2.0 * self.t_step_ms)
         
-        # Initialize spike parameters for each unit (added by me)
-        self.spike_amplitude = []
-        self.spike_duration_ms = []
-        self.spike_rate_hz = []
-        self.firing = []
-        self.spike_time_ms = []
+        # Initialize random state (private to this source)
+        self._rng = np.random.default_rng(seed)
         
-        for i in range(n_units):
-            # Spike amplitude: -200 to -500 µV (negative going spikes)
-            self.spike_amplitude.append(random.uniform(-500.0, -200.0))
-            # Spike duration: 0.3 to 1.7 ms
-            self.spike_duration_ms.append(random.uniform(0.3, 1.7))
-            # Spike rate: 0.1 to 50 Hz (log-uniform distribution)
-            self.spike_rate_hz.append(self._log_uniform(0.1, 50.0))
-            # Status tracking
-            self.firing.append(False)
-            self.spike_time_ms.append(0.0)
-    
-    def _log_uniform(self, min_val, max_val):
-        """Generate log-uniform random value"""
-        log_min = math.log(min_val)
-        log_max = math.log(max_val)
-        return math.exp(random.uniform(log_min, log_max))
-    
-    def _gaussian_noise(self):
-        """Generate Gaussian noise using Central Limit Theorem"""
-        gaussian_n = 6
-        r = 0.0
-        for _ in range(gaussian_n):
-            r += random.uniform(-1.0, 1.0)
-        # Scale factor: sqrt(3.0) / sqrt(n)
-        gaussian_scale_factor = math.sqrt(3.0) / math.sqrt(gaussian_n)
-        r *= gaussian_scale_factor
-        return r
+        # Initialize spike parameters for each unit (added by me), one array
+        # element per unit, drawn the same way as in generate_block()
+        self.spike_amplitude, self.spike_duration_ms, self.spike_rate_hz = _draw_spike_params(self._rng, n_units)
+        # Status tracking
+        self.firing = np.zeros(n_units, dtype=np.bool_)
+        self.spike_time_ms = np.zeros(n_units)
+        
+        # Spike phase per ms and current (decaying) spike amplitude per unit
+        self.spike_omega = 2.0 * math.pi / self.spike_duration_ms
+        self.spike_envelope = self.spike_amplitude.copy()
     
     def _lfp_voltage(self):
         """Generate LFP (Local Field Potential) voltage"""
         # Modulated amplitude: 100-180 µV
-        amplitude = 100.0 + 80.0 * math.sin(2.0 * math.pi * (self.t_ms / 1000.0) * self.lfp_modulation_hz)
+        amplitude = 100.0 + 80.0 * math.sin(self.lfp_modulation_omega * self.t_ms)
         # LFP frequency: 2.3 Hz
-        return amplitude * math.sin(2.0 * math.pi * (self.t_ms / 1000.0) * self.lfp_frequency_hz)
+        return amplitude * math.sin(self.lfp_omega * self.t_ms)
     
     def _next_spike_voltage(self, unit):
         """Generate spike voltage for a specific unit"""
         if self.spike_time_ms[unit] < self.spike_duration_ms[unit]:
             # Exponentially decaying sine wave
-            amplitude = self.spike_amplitude[unit] * math.exp(-2.0 * self.spike_time_ms[unit])
-            phase = 2.0 * math.pi * self.spike_time_ms[unit] / self.spike_duration_ms[unit]
-            result = amplitude * math.sin(phase)
+            result = self.spike_envelope[unit] * math.sin(self.spike_omega[unit] * self.spike_time_ms[unit])
+            self.spike_envelope[unit] *= self.spike_decay_step
             self.spike_time_ms[unit] += self.t_step_ms
             return result
         elif self.spike_time_ms[unit] < self.spike_duration_ms[unit] + self.spike_refractory_period_ms:
@@ -101,13 +125,14 @@ class NeuralSynthSource:
             # End of refractory period, unit can fire again
             self.firing[unit] = False
             self.spike_time_ms[unit] = 0.0
+            self.spike_envelope[unit] = self.spike_amplitude[unit]
             return 0.0
     
     def _seizure_voltage(self):
         """Generate seizure voltage: high amplitude, low frequency bursts"""
         if self.seizure_start_time_ms is None:
             # Random chance to start a seizure
-            if random.random() < self.seizure_probability * self.t_step_ms / 1000.0:
+            if self._rng.random() < self.seizure_probability * self.t_step_ms / 1000.0:
                 self.seizure_start_time_ms = self.t_ms
             return 0.0
         
@@ -115,8 +140,7 @@ class NeuralSynthSource:
         elapsed = self.t_ms - self.seizure_start_time_ms
         if elapsed < self.seizure_duration_ms:
             # Active seizure: low frequency (2.5 Hz) high amplitude bursts
-            time_in_seizure = elapsed / 1000.0  # Convert to seconds
-            seizure_signal = self.seizure_amplitude_uv * math.sin(2.0 * math.pi * self.seizure_freq_hz * time_in_seizure)
+            seizure_signal = self.seizure_amplitude_uv * math.sin(self.seizure_omega * elapsed)
             return seizure_signal
         else:
             # Seizure ended
@@ -125,8 +149,22 @@ class NeuralSynthSource:
     
     def next_sample(self):
         """Generate next sample in microvolts"""
-        # Start with Gaussian noise
-        result = self.noise_rms_level_uv * self._gaussian_noise()
+        # Gaussian noise and LFP
+        result = self.noise_rms_level_uv * self._rng.standard_normal() + self._lfp_voltage()
+        
+        # Add seizure activity if enabled
+        # ------------------------------------------------------------
+        # Seizures are injected as high-amplitude (500 µV), low-frequency (2.5 Hz) sine waves
+        # that last for 6 seconds. They are randomly triggered with 1% probability per sec/ch.
+        if self.enable_seizures:
+            result += self._seizure_voltage()
+        
+        # Spikes (advances time)
+        return result + self._next_spikes()
+    
+    def _next_spikes(self):
+        """Generate next spike sample in microvolts and advance time"""
+        result = 0.0
         
         # Add spike voltages for firing units
         for unit in range(self.n_units):
@@ -137,19 +175,9 @@ class NeuralSynthSource:
                 spike_modulation_factor = (1000.0 - (self.t_ms % 1000.0)) / 1000.0
                 probability = spike_modulation_factor * self.spike_rate_hz[unit] * self.t_step_ms / 1000.0
                 
-                if random.random() < probability:
+                if self._rng.random() < probability:
                     self.firing[unit] = True
         
-        # Add LFP modulation
-        result += self._lfp_voltage()
-        
-        # Add seizure activity if enabled
-        # ------------------------------------------------------------
-        # Seizures are injected as high-amplitude (500 µV), low-frequency (2.5 Hz) sine waves
-        # that last for 6 seconds. They are randomly triggered with 1% probability per sec/ch.
-        if self.enable_seizures:
-            result += self._seizure_voltage()
-        
         # Advance time
         self.t_ms += self.t_step_ms
         
@@ -159,9 +187,194 @@ class NeuralSynthSource:
         """Reset to initial state"""
         self.t_ms = 0.0
         self.seizure_start_time_ms = None
-        for unit in range(self.n_units):
-            self.firing[unit] = False
-            self.spike_time_ms[unit] = 0.0
+        self.firing[:] = False
+        self.spike_time_ms[:] = 0.0
+        self.spike_envelope[:] = self.spike_amplitude
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _simulate_channel(t_step_ms, spike_amplitude, spike_duration_ms, spike_refractory_period_ms,
+                          spike_starts, out):
+        # Same spike model as NeuralSynthSource._next_spikes(), one call per
+        # channel; adds into out, which already holds noise, LFP and seizures.
+        # spike_starts[unit, i] is the outcome of the spike-start draw for
+        # sample i, only consulted while the unit is idle
+        n_units = spike_amplitude.shape[0]
+        firing = np.zeros(n_units, dtype=np.bool_)
+        spike_time_ms = np.zeros(n_units)
+        spike_omega = 2.0 * math.pi / spike_duration_ms
+        spike_envelope = spike_amplitude.copy()
+        spike_decay_step = math.exp(-2.0 * t_step_ms)
+        for i in range(out.shape[0]):
+            result = 0.0
+            for unit in range(n_units):
+                if firing[unit]:
+                    if spike_time_ms[unit] < spike_duration_ms[unit]:
+                        result += spike_envelope[unit] * math.sin(spike_omega[unit] * spike_time_ms[unit])
+                        spike_envelope[unit] *= spike_decay_step
+                        spike_time_ms[unit] += t_step_ms
+                    elif spike_time_ms[unit] < spike_duration_ms[unit] + spike_refractory_period_ms:
+                        spike_time_ms[unit] += t_step_ms
+                    else:
+                        firing[unit] = False
+                        spike_time_ms[unit] = 0.0
+                        spike_envelope[unit] = spike_amplitude[unit]
+                elif spike_starts[unit, i]:
+                    firing[unit] = True
+            out[i] += result
+    
+    @njit(cache=True, parallel=True)
+    def _simulate_channels(t_step_ms, spike_amplitude, spike_duration_ms, spike_refractory_period_ms,
+                           spike_starts, out):
+        # Channels are independent and bring their own spike starts, so each
+        # thread takes whole channels (one row of the parameter arrays)
+        for channel in prange(out.shape[0]):
+            _simulate_channel(t_step_ms, spike_amplitude[channel], spike_duration_ms[channel],
+                              spike_refractory_period_ms, spike_starts[channel], out[channel])
+    
+    @njit(cache=True, fastmath=True)
+    def _quantize16_kernel(voltages, out):
+        # Scale, round, offset, clip and cast in one pass over the voltages,
+        # all in float32 like the NumPy path, so out-of-range voltages clip
+        # instead of wrapping in an integer cast. The clip is min/max rather
+        # than if/elif so the loop stays branchless and vectorizes
+        scale = np.float32(1.0 / 0.195)
+        for i in range(voltages.size):
+            code16 = np.rint(voltages[i] * scale) + np.float32(32768.0)
+            out[i] = np.uint16(min(max(code16, np.float32(0.0)), np.float32(65535.0)))
+
+def _add_spikes(t_step_ms, spike_amplitude, spike_duration_ms, spike_refractory_period_ms,
+                spike_starts, row):
+    """Add one channel's spikes to row in place (NumPy version of _simulate_channel()).
+
+    spike_starts[unit, i] is the spike-start draw for sample i. An idle unit
+    fires at its next start; it then ignores starts through the spike, the
+    refractory period and the sample that resets it.
+    """
+    samples_per_channel = row.shape[0]
+    spike_decay_step = math.exp(-2.0 * t_step_ms)
+    for unit in range(spike_amplitude.shape[0]):
+        # Spike waveform and samples the unit stays busy, stepped exactly like
+        # NeuralSynthSource._next_spike_voltage()
+        waveform = []
+        envelope = spike_amplitude[unit]
+        spike_omega = 2.0 * math.pi / spike_duration_ms[unit]
+        spike_time_ms = 0.0
+        while spike_time_ms < spike_duration_ms[unit]:
+            waveform.append(envelope * math.sin(spike_omega * spike_time_ms))
+            envelope *= spike_decay_step
+            spike_time_ms += t_step_ms
+        busy = len(waveform)
+        while spike_time_ms < spike_duration_ms[unit] + spike_refractory_period_ms:
+            spike_time_ms += t_step_ms
+            busy += 1
+        
+        starts = []
+        next_start = 0
+        for start in np.flatnonzero(spike_starts[unit]).tolist():
+            if start >= next_start:
+                starts.append(start)
+                next_start = start + busy + 2
+        
+        # The waveform begins the sample after the start; accepted spikes never
+        # overlap, so the fancy-indexed add touches each sample at most once
+        idx = np.add.outer(np.array(starts, dtype=np.intp), np.arange(1, len(waveform) + 1))
+        values = np.broadcast_to(np.array(waveform, dtype=np.float32), idx.shape)
+        in_range = idx < samples_per_channel
+        row[idx[in_range]] += values[in_range]
+
+def _add_seizures(voltages, rngs, sample_rate):
+    """Add randomly scheduled seizures to voltages (num_channels, samples_per_channel) in place.
+
+    rngs holds one Generator per channel.
+    Same model as NeuralSynthSource._seizure_voltage(): while no seizure is
+    active, each sample starts one with probability SEIZURE_PROBABILITY per
+    second; it then runs for SEIZURE_DURATION_MS, and the sample after it only
+    ends it.
+    """
+    samples_per_channel = voltages.shape[1]
+    t_step_ms = 1000.0 / sample_rate
+    p_per_step = SEIZURE_PROBABILITY * t_step_ms / 1000.0
+    
+    # Every seizure is the same waveform, so compute it once
+    seizure_len = math.ceil(SEIZURE_DURATION_MS / t_step_ms)
+    elapsed_s = np.arange(seizure_len) * (t_step_ms / 1000.0)
+    waveform = (SEIZURE_AMPLITUDE_UV * np.sin(2.0 * np.pi * SEIZURE_FREQ_HZ * elapsed_s)).astype(np.float32)
+    
+    for row, rng in zip(voltages, rngs):
+        # Candidate starts for the whole timeline; those landing inside an
+        # earlier seizure are ignored
+        next_start = 0
+        for start in np.flatnonzero(rng.random(samples_per_channel) < p_per_step).tolist():
+            if start < next_start:
+                continue
+            k = min(seizure_len, samples_per_channel - start)
+            row[start:start + k] += waveform[:k]
+            next_start = start + seizure_len + 1
+
+def generate_block(num_channels, samples_per_channel, sample_rate, seed=None, enable_seizures=True,
+                   n_units=2):
+    """Generate voltages in microvolts as a float32 (num_channels, samples_per_channel) array.
+
+    Each channel draws from its own Generator, spawned from seed (None for
+    fresh entropy), and the spike parameters of its n_units units are held
+    as (num_channels, n_units) arrays.
+    """
+    t_step_ms = 1000.0 / sample_rate
+    rngs = [np.random.default_rng(child_seed) for child_seed in np.random.SeedSequence(seed).spawn(num_channels)]
+    spike_amplitude, spike_duration_ms, spike_rate_hz = (
+        np.stack(params) for params in zip(*(_draw_spike_params(rng, n_units) for rng in rngs)))
+    
+    # Gaussian noise: one vectorized draw per channel, straight into its row;
+    # the signals below are added on top of it
+    voltages = np.empty((num_channels, samples_per_channel), dtype=np.float32)
+    for rng, row in zip(rngs, voltages):
+        rng.standard_normal(dtype=np.float32, out=row)
+    voltages *= np.float32(NOISE_RMS_LEVEL_UV)
+    
+    # The LFP depends only on time, so compute it once and add it to every channel.
+    # (100 + 80 sin(w_mod t)) * sin(w t) runs as float32 in-place ufuncs; phases
+    # are wrapped to [0, 2π) in float64 first so long recordings keep precision
+    sample_idx = np.arange(samples_per_channel)
+    amplitude = np.empty(samples_per_channel, dtype=np.float32)
+    lfp = np.empty(samples_per_channel, dtype=np.float32)
+    np.remainder(sample_idx * (2.0 * np.pi * LFP_MODULATION_HZ / sample_rate), 2.0 * np.pi,
+                 out=amplitude, casting='same_kind')
+    np.sin(amplitude, out=amplitude)
+    amplitude *= np.float32(80.0)
+    amplitude += np.float32(100.0)  # Modulated amplitude: 100-180 µV
+    np.remainder(sample_idx * (2.0 * np.pi * LFP_FREQUENCY_HZ / sample_rate), 2.0 * np.pi,
+                 out=lfp, casting='same_kind')
+    np.sin(lfp, out=lfp)
+    lfp *= amplitude
+    voltages += lfp
+    
+    if enable_seizures:
+        _add_seizures(voltages, rngs, sample_rate)
+    
+    # Spike starts for every unit and sample in one Bernoulli draw per channel:
+    # the start probability only depends on time (modulated over each second)
+    # and the unit's rate; whether an idle unit is there to start is resolved below
+    t_ms = np.arange(samples_per_channel) * t_step_ms
+    spike_step_probability = (1000.0 - (t_ms % 1000.0)) / 1000.0 * t_step_ms / 1000.0
+    spike_starts = np.empty((num_channels, n_units, samples_per_channel), dtype=np.bool_)
+    for rng, rates, starts in zip(rngs, spike_rate_hz, spike_starts):
+        uniforms = rng.random((n_units, samples_per_channel), dtype=np.float32)
+        np.less(uniforms, np.outer(rates, spike_step_probability), out=starts)
+    
+    if njit is not None:
+        _simulate_channels(t_step_ms, spike_amplitude, spike_duration_ms, SPIKE_REFRACTORY_PERIOD_MS,
+                           spike_starts, voltages)
+    else:
+        for channel in range(num_channels):
+            _add_spikes(t_step_ms, spike_amplitude[channel], spike_duration_ms[channel],
+                        SPIKE_REFRACTORY_PERIOD_MS, spike_starts[channel], voltages[channel])
+    
+    return voltages
+
+def _default_seed(enable_seizures):
+    """Seed from the current time for truly random runs (fixed without seizures)"""
+    return int(time.time() * 1000) if enable_seizures else 0
 
 def generate_data(num_channels=32, samples_per_channel=5000, sample_rate=1000.0, enable_seizures=True):
     """Generate realistic synthetic neural data quantized to 8-bit (0–255).
@@ -170,29 +383,20 @@ def generate_data(num_channels=32, samples_per_channel=5000, sample_rate=1000.0,
     New FPGA/Verilog tests use 16-bit Intan-style ADC codes generated by
     generate_data_intan16() below.
     """
-    data_bytes = num_channels * samples_per_channel
-    packet = bytearray(data_bytes)
-    
-    sources = []
-    for channel in range(num_channels):
-        # Use channel number + current time for truly random but reproducible per channel
-        random_seed = channel + int(time.time() * 1000) if enable_seizures else channel
-        sources.append(NeuralSynthSource(sample_rate, n_units=2, seed=random_seed, enable_seizures=enable_seizures))
-    
-    for channel in range(num_channels):
-        for sample in range(samples_per_channel):
-            voltage_uv = sources[channel].next_sample()
-            
-            # Legacy 8-bit quantization: map from approximately
-            # -6389.76 µV to +6389.57 µV into 0–255.
-            quantized = int((voltage_uv + 6389.76) * 255.0 / 12779.33)
-            quantized = max(0, min(255, quantized))
-            
-            packet[channel * samples_per_channel + sample] = quantized
+    voltages = generate_block(num_channels, samples_per_channel, sample_rate, _default_seed(enable_seizures),
+                              enable_seizures)
+    return _quantize8(voltages)
+
+def _quantize8(voltages):
+    """Quantize a (num_channels, samples_per_channel) voltage array to the legacy 8-bit bytearray."""
+    # Legacy 8-bit quantization: map from approximately
+    # -6389.76 µV to +6389.57 µV into 0–255 (truncating like int())
+    quantized = ((voltages + 6389.76) * (255.0 / 12779.33)).astype(np.int32)
+    np.clip(quantized, 0, 255, out=quantized)
     
     # 32 channels × 128 samples × 1 byte 
     # = 4096 bytes = 4 KB
-    return packet
+    return bytearray(quantized.astype(np.uint8).tobytes())
 
 
 def generate_data_intan16(num_channels=32, samples_per_channel=5000, sample_rate=1000.0, enable_seizures=True):
@@ -202,31 +406,24 @@ def generate_data_intan16(num_channels=32, samples_per_channel=5000, sample_rate
         code16 = round(voltage_uv / 0.195) + 32768
         clipped to [0, 65535]
     """
-    import numpy as np
-
-    total_samples = num_channels * samples_per_channel
-    data16 = np.zeros(total_samples, dtype=np.uint16)
+    voltages = generate_block(num_channels, samples_per_channel, sample_rate, _default_seed(enable_seizures),
+                              enable_seizures)
     
-    sources = []
-    for channel in range(num_channels):
-        random_seed = channel + int(time.time() * 1000) if enable_seizures else channel
-        sources.append(NeuralSynthSource(sample_rate, n_units=2, seed=random_seed, enable_seizures=enable_seizures))
-    
-    for channel in range(num_channels):
-        for sample in range(samples_per_channel):
-            voltage_uv = sources[channel].next_sample()
-            
-            # Convert microvolts to 16-bit ADC code (Intan style)
-            code16 = int(round(voltage_uv / 0.195)) + 32768
-            if code16 < 0:
-                code16 = 0
-            elif code16 > 65535:
-                code16 = 65535
-            
-            idx = channel * samples_per_channel + sample
-            data16[idx] = code16
+    # Convert microvolts to 16-bit ADC codes (Intan style) over the whole
+    # array; rint rounds half to even like round().
+    # Channel-major: channel c occupies [c*samples_per_channel, (c+1)*samples_per_channel)
+    if njit is not None:
+        data16 = np.empty(voltages.size, dtype=np.uint16)
+        _quantize16_kernel(voltages.ravel(), data16)
+        return data16
     
-    return data16
+    # Rounded codes are exact in float32, so offset and clip them in place and
+    # cast once (no int32 temporary, no wraparound for out-of-range voltages)
+    code16 = voltages * np.float32(1.0 / 0.195)
+    np.rint(code16, out=code16)
+    code16 += 32768
+    np.clip(code16, 0, 65535, out=code16)
+    return code16.astype(np.uint16).ravel()
 
 if __name__ == "__main__":
     import matplotlib.pyplot as plt
@@ -248,21 +445,26 @@ if __name__ == "__main__":
         plt.savefig(filename, dpi=150, bbox_inches='tight')
         print(f"Saved visualization to {filename}")
     
-    # Run for 0.1 second without seizures
+    # Generate 1 minute of normal activity once; every run below reuses it
+    samples_1min = 60000 # 1kHz aka 60000 samples
+    base = generate_block(num_channels=32, samples_per_channel=samples_1min, sample_rate=1000.0,
+                          seed=0, enable_seizures=False)
+    
+    # Run for 0.1 second without seizures (start of the same recording)
     samples_01sec = 100  # 1kHz aka 100 samples
-    data_normal_01sec = generate_data(num_channels=32, samples_per_channel=samples_01sec, 
-                                                       sample_rate=1000.0, enable_seizures=False)
+    data_normal_01sec = _quantize8(base[:, :samples_01sec])
     visualize(data_normal_01sec, samples_01sec, "Normal Neural Data (0.1 second at 1kHz)", "synthetic_normal_0.1sec.png")
 
     # Run for 1 minute without seizures
-    samples_1min = 60000 # 1kHz aka 60000 samples
-    data_normal = generate_data(num_channels=32, samples_per_channel=samples_1min, 
-                                                 sample_rate=1000.0, enable_seizures=False)
+    data_normal = _quantize8(base)
     visualize(data_normal, samples_1min, "Normal Neural Data (1 minute at 1kHz)", "synthetic_normal_1min.png")
     
-    # Run for 1 minute with seizures
-    data_seizure = generate_data(num_channels=32, samples_per_channel=samples_1min, 
-                                                  sample_rate=1000.0, enable_seizures=True)
+    # Run for 1 minute with seizures: the same activity plus randomly timed seizures
+    seizure_rngs = [np.random.default_rng(child_seed)
+                    for child_seed in np.random.SeedSequence(int(time.time() * 1000)).spawn(base.shape[0])]
+    with_seizures = base.copy()
+    _add_seizures(with_seizures, seizure_rngs, sample_rate=1000.0)
+    data_seizure = _quantize8(with_seizures)
     visualize(data_seizure, samples_1min, "Neural Data with Seizures (1 minute at 1kHz)", "synthetic_seizure_1min.png")
     
     print("\nDone!")